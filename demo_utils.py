@@ -0,0 +1,186 @@
+"""
+Shared helpers for the NetPyNE summation demos
+
+- Command-line options (--mode/--output/--synapse) and Matplotlib backend selection
+- Adding deterministic NetStim inputs to a network
+- Running the network and reading back the recorded traces
+- On-disk cache of traces keyed on the network and simulation parameters
+- Downsampled, prebuilt-or-live animation in the --mode the user picked
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+from netpyne import sim
+from neuron import h
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.animation import ArtistAnimation, FuncAnimation
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# NEURON worker threads (cells are distributed across threads); override with
+# the NETPYNE_THREADS environment variable when extending the network
+NTHREADS = int(os.environ.get('NETPYNE_THREADS', 1))
+
+# Cap on vertices drawn per line; longer prefixes are strided down to this size
+MAX_PLOT_POINTS = 2000
+
+# Short runs prebuild every frame's artists once so the animation only swaps
+# them; longer runs would hold too many artists and call update() per frame
+MAX_PREBUILT_FRAMES = 1500
+
+# Target settings shared by every stimulus
+STIM_CONN_DEFAULTS = {'delay': 1.0, 'sec': 'soma', 'loc': 0.5}
+
+
+def parse_args(description, output_stem, synapses=None):
+    """Parse the demo command line; default output files are named after `output_stem`.
+
+    When `synapses` is given, a --synapse option chooses one of them
+    (default: the first).
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--mode', choices=('live', 'mp4', 'static'), default='live',
+                        help="'live' shows the animation, 'mp4' renders it to a video file "
+                             "with ffmpeg, 'static' saves only the final plot")
+    parser.add_argument('--output', default=None,
+                        help="output file for the mp4/static modes "
+                             f"(default: {output_stem}.mp4 / {output_stem}.png)")
+    if synapses:
+        parser.add_argument('--synapse', choices=tuple(synapses), default=next(iter(synapses)),
+                            help="synaptic mechanism driving the cells (default: %(default)s)")
+    args = parser.parse_args()
+    if args.output is None and args.mode != 'live':
+        args.output = f"{output_stem}.{'mp4' if args.mode == 'mp4' else 'png'}"
+    return args
+
+
+def select_backend(mode):
+    """Pick the Matplotlib backend for the given --mode."""
+    if mode != 'live':
+        plt.switch_backend('Agg')  # headless: nothing is drawn on screen
+        return
+    # Prefer Qt (faster blitting/event loop), fall back to Tk; if neither GUI
+    # toolkit is importable Matplotlib keeps its default (non-interactive) backend
+    for backend in ('QtAgg', 'Qt5Agg', 'TkAgg'):
+        try:
+            plt.switch_backend(backend)
+            return
+        except ImportError:
+            continue
+
+
+def add_stim(netParams, name, pop, start, interval, number, synMech, weight, cell_list=None):
+    """Add a regular NetStim spike train (noise = 0) and target it at `pop`.
+
+    `cell_list` restricts the target to those cell indices of `pop`
+    (stimTargetParams 'conds' supports it; None targets every cell).
+    """
+    netParams.stimSourceParams[name] = {'type': 'NetStim', 'start': start, 'interval': interval,
+                                        'number': number, 'noise': 0}
+    conds = {'pop': pop}
+    if cell_list is not None:
+        conds['cellList'] = list(cell_list)
+    netParams.stimTargetParams[f'{name}->{pop}'] = dict(
+        STIM_CONN_DEFAULTS, source=name, conds=conds, synMech=synMech, weight=weight)
+
+
+def run_simulation(netParams, simConfig):
+    """Create and run the network on NTHREADS threads, and return the recorded simData dict."""
+    if NTHREADS > 1:
+        # NetPyNE records t via Vector.record(h._ref_t), which NEURON cannot
+        # assign to a thread once nthread > 1; cached_traces() rebuilds the
+        # time axis from recordStep instead
+        simConfig.recordTime = False
+
+    sim.create(netParams=netParams, simConfig=simConfig)
+    num_cells = len(sim.net.cells)
+    if NTHREADS > num_cells:
+        print(f"Warning: {NTHREADS} threads requested for {num_cells} cells; extra threads will be idle.")
+    h.ParallelContext().nthread(NTHREADS)
+
+    sim.runSim()
+    # In a single process the traces are already local in sim.simData; only
+    # gather (pickle + merge per-host data) when running across MPI hosts
+    if sim.nhosts > 1:
+        sim.gatherData()
+        return sim.allSimData
+    return sim.simData
+
+
+def cached_traces(netParams, simConfig, extract):
+    """Return the recorded traces, re-running the simulation only when needed.
+
+    `extract(simData)` maps NetPyNE's simData to a dict of voltage arrays; the
+    result also holds the time axis under 't'. Traces are saved to
+    CACHE_DIR/<key>.npz, where <key> hashes the netParams and simConfig dicts.
+    """
+    cache_key = hashlib.sha1(json.dumps(
+        {'netParams': netParams.todict(), 'simConfig': simConfig.todict()},
+        sort_keys=True, default=str).encode()).hexdigest()[:12]
+    cache_path = os.path.join(CACHE_DIR, f'{cache_key}.npz')
+
+    if os.path.exists(cache_path):
+        print(f"Loading cached simulation results from {cache_path}")
+        with np.load(cache_path) as data:
+            return dict(data)
+
+    print("Running simulation...")
+    simData = run_simulation(netParams, simConfig)
+    print("Simulation finished.")
+
+    # NumPy arrays, so slicing in the animation's update() returns views
+    voltages = extract(simData)
+    if simConfig.recordTime:
+        time = np.asarray(simData['t'], dtype=np.float64)
+    else:
+        # Threaded run: one sample every recordStep from t = 0, as many as recorded
+        num_samples = max((v.size for v in voltages.values()), default=0)
+        time = np.arange(num_samples) * simConfig.recordStep
+    traces = {'t': time, **voltages}
+
+    # Only cache complete results: every trace recorded and aligned with t
+    if time.size and all(v.shape == time.shape for v in voltages.values()):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.savez_compressed(cache_path, **traces)
+    else:
+        print("Warning: recorded traces are empty or do not match the time axis; not caching this run.")
+    return traces
+
+
+def visible_slice(idx):
+    """Slice over the first `idx` samples, strided to at most ~MAX_PLOT_POINTS vertices."""
+    return slice(0, idx, max(1, idx // MAX_PLOT_POINTS))
+
+
+def run_animation(args, fig, update, init, frames, frame_artists_fn, interval):
+    """Show, save or snapshot the animation according to args.mode.
+
+    `update(frame)` and `init()` drive a FuncAnimation over `frames` frames;
+    `frame_artists_fn(frame)` returns the artists to show on frame 1..frames
+    when the whole animation is short enough to prebuild.
+    """
+    if args.mode == 'static':
+        # Single draw of the final frame instead of rendering the whole animation
+        update(frames)
+        fig.savefig(args.output, dpi=100)
+        print(f"Saved final plot to {args.output}")
+        return
+
+    if frames <= MAX_PREBUILT_FRAMES:
+        artists = [frame_artists_fn(frame) for frame in range(1, frames + 1)]
+        ani = ArtistAnimation(fig, artists, interval=interval, blit=True, repeat=True)
+    else:
+        ani = FuncAnimation(fig, update, frames=frames, init_func=init,
+                            interval=interval, blit=True, repeat=True)
+
+    if args.mode == 'mp4':
+        ani.save(args.output, fps=30, dpi=100, writer='ffmpeg')
+        print(f"Saved animation to {args.output}")
+    else:
+        print("\nStarting live animation... The window will stay open and loop until you close it.")
+        plt.show()  # This blocks until the window is closed
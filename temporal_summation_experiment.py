@@ -7,16 +7,50 @@ This script demonstrates temporal summation by comparing two conditions:
 
 The results are shown in a live Matplotlib animation that builds the traces
 progressively over time, simulating the process unfolding in real-time.
+
+Pass --synapse GABA to run the inhibitory version of the same experiment
+(summating IPSPs instead of EPSPs).
 """
 
 # Import necessary modules
-from netpyne import specs, sim
+import math
+
+from netpyne import specs
+import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-import matplotlib
 
-# This fixes the issue where the plot window closes immediately on many Windows systems
-matplotlib.use('TkAgg')  # Use TkAgg backend (works well on Windows for interactive plots)
+import demo_utils
+
+# Per-synapse settings: ExpSyn mechanism parameters, base weight and plot y-limits.
+# The inputs are >= 5 ms apart, far longer than a 0.5 ms rise time, so a
+# single-exponential ExpSyn (decay tau only) keeps the summation picture
+SYNAPSES = {
+    'AMPA': {'tau': 5.0, 'e': 0, 'weight': 0.001, 'ylim': (-75, -30)},   # excitatory
+    'GABA': {'tau': 10.0, 'e': -80, 'weight': 0.001, 'ylim': (-80, -60)},  # inhibitory
+}
+# Rise time constant (ms) of the Exp2Syn mechanisms the ExpSyns replace
+EXP2SYN_TAU1 = 0.5
+
+
+def exp2syn_charge_factor(tau1, tau2):
+    """Weight factor that gives an ExpSyn(tau2) the charge of an Exp2Syn(tau1, tau2).
+
+    Exp2Syn normalizes its conductance so the peak of exp(-t/tau2) - exp(-t/tau1)
+    (reached at tp) equals the weight; ExpSyn has no such normalization.
+    """
+    tp = tau1 * tau2 / (tau2 - tau1) * math.log(tau2 / tau1)
+    return (tau2 - tau1) / (tau2 * (math.exp(-tp / tau2) - math.exp(-tp / tau1)))
+
+
+args = demo_utils.parse_args('Temporal summation experiment (wide vs narrow spike interval)',
+                             output_stem='temporal_summation', synapses=SYNAPSES)
+demo_utils.select_backend(args.mode)
+
+# Synapse type driving both cells
+SYNAPSE = args.synapse
+syn = SYNAPSES[SYNAPSE]
+# Same charge per input as the original Exp2Syn with the same decay tau
+weight = syn['weight'] * exp2syn_charge_factor(EXP2SYN_TAU1, syn['tau'])
 
 # Network Parameters (netParams)
 netParams = specs.NetParams()
@@ -50,56 +84,24 @@ netParams.popParams['postPop'] = {
 }
 
 # Synapse Mechanisms
-netParams.synMechParams['AMPA'] = {
-    'mod': 'Exp2Syn',
-    'tau1': 0.5,
-    'tau2': 5.0,
-    'e': 0
-}
+netParams.synMechParams[SYNAPSE] = {'mod': 'ExpSyn', 'tau': syn['tau'], 'e': syn['e']}
 
-# Stimulation Sources
-netParams.stimSourceParams['stimWide'] = {
-    'type': 'NetStim',
-    'start': 20.0,
-    'interval': 40.0,
-    'noise': 0,
-    'number': 2
-}
-
-netParams.stimTargetParams['stimWide->post0'] = {
-    'source': 'stimWide',
-    'conds': {'pop': 'postPop', 'cellList': [0]},
-    'synMech': 'AMPA',
-    'weight': 0.001,
-    'delay': 1.0,
-    'sec': 'soma',
-    'loc': 0.5
-}
-
-netParams.stimSourceParams['stimNarrow'] = {
-    'type': 'NetStim',
-    'start': 20.0,
-    'interval': 5.0,
-    'noise': 0,
-    'number': 2
-}
-
-netParams.stimTargetParams['stimNarrow->post1'] = {
-    'source': 'stimNarrow',
-    'conds': {'pop': 'postPop', 'cellList': [1]},
-    'synMech': 'AMPA',
-    'weight': 0.001,
-    'delay': 1.0,
-    'sec': 'soma',
-    'loc': 0.5
-}
+# Stimulation Sources (deterministic NetStims: noise = 0)
+demo_utils.add_stim(netParams, 'stimWide', 'postPop', start=20.0, interval=40.0, number=2,
+                    synMech=SYNAPSE, weight=weight, cell_list=[0])
+demo_utils.add_stim(netParams, 'stimNarrow', 'postPop', start=20.0, interval=5.0, number=2,
+                    synMech=SYNAPSE, weight=weight, cell_list=[1])
 
 # Simulation Configuration (simConfig)
 simConfig = specs.SimConfig()
 
 simConfig.duration = 200.0
 simConfig.dt = 0.025
-simConfig.recordStep = 0.025
+simConfig.recordStep = 0.1  # subthreshold EPSPs only; no need to record every dt
+# Variable-step integration: long quiescent stretches between synaptic events
+# take a few large steps; traces are still sampled every recordStep
+simConfig.cvode_active = True
+simConfig.cvode_atol = 1e-3
 simConfig.verbose = False
 
 simConfig.recordCells = [0, 1]
@@ -107,21 +109,24 @@ simConfig.recordTraces = {
     'V_soma': {'sec': 'soma', 'loc': 0.5, 'var': 'v'}
 }
 
-# Create and Run Simulation
-print("Creating network and running simulation...")
-sim.createSimulateAnalyze(netParams=netParams, simConfig=simConfig)
-print("Simulation complete!")
-
-# Extract Data for Animation
-time = sim.allSimData['t']
-
-if 'V_soma' in sim.allSimData and isinstance(sim.allSimData['V_soma'], dict):
-    V_wide = sim.allSimData['V_soma'].get('cell_0', [])
-    V_narrow = sim.allSimData['V_soma'].get('cell_1', [])
-else:
+# Only the soma voltage traces are used, so skip spike/stim recording
+simConfig.recordCellsSpikes = []
+simConfig.recordStim = False
+simConfig.saveDataInclude = ['simData']
+simConfig.saveJson = False
+simConfig.analysis = {}  # the custom animation below replaces NetPyNE's plots
+
+# Extract Data for Animation; results are cached on disk, keyed on the network
+# and simulation parameters, so re-running to tweak the animation skips NEURON
+def extract_traces(simData):
+    if 'V_soma' in simData and isinstance(simData['V_soma'], dict):
+        return {'v_wide': np.asarray(simData['V_soma'].get('cell_0', []), dtype=np.float64),
+                'v_narrow': np.asarray(simData['V_soma'].get('cell_1', []), dtype=np.float64)}
     print("Error: Voltage data not available.")
-    V_wide = []
-    V_narrow = []
+    return {'v_wide': np.empty(0), 'v_narrow': np.empty(0)}
+
+traces = demo_utils.cached_traces(netParams, simConfig, extract_traces)
+time, V_wide, V_narrow = traces['t'], traces['v_wide'], traces['v_narrow']
 
 
 # Live Animation Setup
@@ -129,42 +134,47 @@ else:
 fig, ax = plt.subplots(figsize=(12, 7))
 ax.set_xlabel('Time (ms)', fontsize=12, fontweight='bold')
 ax.set_ylabel('Membrane Potential (mV)', fontsize=12, fontweight='bold')
-ax.set_title('Live Demo: Temporal Summation Over Time', fontsize=16, fontweight='bold')
+ax.set_title(f'Live Demo: Temporal Summation Over Time ({SYNAPSE})', fontsize=16, fontweight='bold')
 ax.grid(True, alpha=0.3)
 ax.set_xlim(0, 200)
-ax.set_ylim(-75, -30)
+ax.set_ylim(*syn['ylim'])
 
 line_wide, = ax.plot([], [], 'b-', linewidth=3, label='Wide Interval (40 ms apart)')
 line_narrow, = ax.plot([], [], 'r-', linewidth=3, label='Narrow Interval (5 ms apart)')
 ax.legend(loc='upper right', fontsize=12)
 
-stim_lines = []
+# Stimulus markers are created once and only toggled in update(), so the
+# artist set stays fixed and blitting can be used
+STIM_TIMES = (21.0, 26.0, 61.0)  # stimulus arrival times (ms), incl. 1 ms delay
+stim_lines = [ax.axvline(x, color='gray', linestyle='--', alpha=0.7, linewidth=2, visible=False)
+              for x in STIM_TIMES]
 summation_patch = ax.axvspan(20, 35, alpha=0.15, color='yellow')
 summation_patch.set_visible(False)
 
+# Controls animation speed: if we increase FRAME_STEP, the animation goes faster
+FRAME_STEP = 4
+N_SAMPLES = time.size
+
+# Sample indices at which each stimulus marker appears (computed once, not per frame)
+STIM_IDX = tuple(int(t / simConfig.recordStep) for t in STIM_TIMES)
+
 def init():
     line_wide.set_data([], [])
     line_narrow.set_data([], [])
     for sl in stim_lines:
-        sl.remove()
-    stim_lines.clear()
+        sl.set_visible(False)
     summation_patch.set_visible(False)
-    return [line_wide, line_narrow, summation_patch]
+    return [line_wide, line_narrow, summation_patch] + stim_lines
 
 def update(frame):
-    step = 16  # Controls animation speed: If we increase this, the animation goes faster
-    idx = min(frame * step, len(time))
+    idx = min(frame * FRAME_STEP, N_SAMPLES)
+    view = demo_utils.visible_slice(idx)
     
-    line_wide.set_data(time[:idx], V_wide[:idx])
-    line_narrow.set_data(time[:idx], V_narrow[:idx])
+    line_wide.set_data(time[view], V_wide[view])
+    line_narrow.set_data(time[view], V_narrow[view])
     
-    dt = simConfig.dt
-    if idx >= int(21 / dt) and len(stim_lines) < 1:
-        stim_lines.append(ax.axvline(21, color='gray', linestyle='--', alpha=0.7, linewidth=2))
-    if idx >= int(26 / dt) and len(stim_lines) < 2:
-        stim_lines.append(ax.axvline(26, color='gray', linestyle='--', alpha=0.7, linewidth=2))
-    if idx >= int(61 / dt) and len(stim_lines) < 3:
-        stim_lines.append(ax.axvline(61, color='gray', linestyle='--', alpha=0.7, linewidth=2))
+    for sl, stim_idx in zip(stim_lines, STIM_IDX):
+        sl.set_visible(idx >= stim_idx)
     
     if idx > 0 and 20 <= time[idx-1] <= 35:
         summation_patch.set_visible(True)
@@ -173,10 +183,20 @@ def update(frame):
     
     return [line_wide, line_narrow, summation_patch] + stim_lines
 
-num_frames = (len(time) // 8) + 20
-ani = FuncAnimation(fig, update, frames=num_frames, init_func=init,
-                    blit=False, interval=80, repeat=True)  # blit=False is more reliable on Windows
+# The traces finish halfway through; the remaining frames hold the full plot before looping
+num_frames = (N_SAMPLES * 2 // FRAME_STEP) + 20
+
+# Lines built for each sample count; hold frames at the end reuse the finished lines
+frame_lines = {}
 
-print("\nStarting live animation... The window will stay open and loop until you close it.")
-plt.show()  # This blocks until the window is closed
+def frame_artists(frame):
+    idx = min(frame * FRAME_STEP, N_SAMPLES)
+    if idx not in frame_lines:
+        view = demo_utils.visible_slice(idx)
+        frame_lines[idx] = [ax.plot(time[view], V_wide[view], 'b-', linewidth=3)[0],
+                            ax.plot(time[view], V_narrow[view], 'r-', linewidth=3)[0]]
+    markers = [sl for sl, stim_idx in zip(stim_lines, STIM_IDX) if idx >= stim_idx]
+    patch = [summation_patch] if 20 <= time[idx-1] <= 35 else []
+    return frame_lines[idx] + patch + markers
 
+demo_utils.run_animation(args, fig, update, init, num_frames, frame_artists, interval=80)